@@ -5,7 +5,6 @@ classes defining position, vacancy, and actor behaviour
 from mesa import Agent
 from entity import Entity
 from numpy import random
-from uuid import uuid4
 from collections import Counter
 import numpy as np
 
@@ -25,7 +24,11 @@ class Actor(Entity):
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
         self.type = "actor"
-        self.move_probability = self.model.move_probabilities["actor retirement probs"]
+
+    @property
+    def move_probability(self):
+        """the per-level retirement probabilities in force this step, as set by the model's firing schedule"""
+        return self.model.actor_retirement_probs
 
     def step(self):
         """may retire"""
@@ -37,7 +40,7 @@ class Actor(Entity):
     def advance(self):
         """if retiring, call an outside vacancy to take your place, else update your log"""
         if self._next_state == "retire":
-            v = Vacancy(uuid4(), self.model)
+            v = Vacancy(self.model.next_id(), self.model)
             self.retire(v)
         else:
             self.unmoving_update_log()
@@ -49,7 +52,11 @@ class Vacancy(Entity):
     def __init__(self, unique_id, model):
         super().__init__(unique_id, model)
         self.type = "vacancy"
-        self.move_probability = self.model.move_probabilities["vacancy move probs"]
+
+    @property
+    def move_probability(self):
+        """the move probabilities in force this step for vacancies in this level, as set by the firing schedule"""
+        return self.model.vacancy_move_probs[int(self.position[0]) - 1]
 
     def step(self):
         """vacancies stay put, move in level, move down, or retire"""
@@ -70,7 +77,7 @@ class Vacancy(Entity):
             self.unmoving_update_log()
             return
         if self._next_state == "retire":  # the retirees
-            a = Actor(uuid4(), self.model)
+            a = Actor(self.model.next_id(), self.model)
             self.retire(a)
             return
         if self._next_state in self.model.retiree_spots:  # those that want retiree spots; bow out
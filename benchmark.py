@@ -0,0 +1,97 @@
+"""
+timing benchmarks for MobilityModel: how long it takes to set up an organisation, and to simulate it
+run this module as a script to print the timings
+"""
+
+import os
+from random import shuffle
+from tempfile import TemporaryDirectory
+from timeit import default_timer
+from uuid import uuid4
+from agent import Actor, Position, Vacancy
+from model import MobilityModel, save_occupancy_snapshot, load_occupancy_snapshot
+from random_simultaneous import SimultaneousActivation
+
+
+def time_initialisation(model_params, repeats=3):
+    """return the best of several wall-clock times (in seconds) it takes to initialise a MobilityModel"""
+    timings = []
+    for i in range(repeats):
+        start = default_timer()
+        MobilityModel(**model_params)
+        timings.append(default_timer() - start)
+    return min(timings)
+
+
+# the one-position-at-a-time initialiser that MobilityModel used before, kept here as a baseline
+
+def fraction_of_list(fraction, list_length):
+    """Returns a list of bools split according to a float [0,1]"""
+    fraction_trues = int(list_length * fraction)
+    list_of_bools = fraction_trues * [True] + (list_length - fraction_trues) * [False]
+    shuffle(list_of_bools)
+    return list_of_bools
+
+
+def populate_one_at_a_time(model, positions_per_level, initial_vacancy_fraction):
+    """(re)populate a model's positions and scheduler the way the old initialiser did"""
+    model.positions_per_level = positions_per_level
+    model.schedule = SimultaneousActivation(model)
+    model.positions = {i: {} for i in range(1, model.num_levels + 1)}
+    for i in range(model.num_levels):
+        vacancies = fraction_of_list(initial_vacancy_fraction, positions_per_level[i])
+        for j in range(positions_per_level[i]):
+            position_id = str(i + 1) + '-' + str(j + 1)
+            p = Position(position_id, model)
+            model.positions[i + 1][position_id] = p
+            agent = Vacancy(uuid4(), model) if vacancies[j] else Actor(uuid4(), model)
+            model.schedule.add(agent)
+            agent.position = p.unique_id
+            p.dual = [agent.unique_id, agent.type]
+            agent.log.append(p.unique_id)
+            p.log.append(agent.unique_id)
+
+
+def time_one_at_a_time_initialisation(model_params, repeats=3):
+    """
+    return the best of several wall-clock times (in seconds) it takes the old initialiser to set up the same
+    organisation; the model around it is built with one position per level, which takes next to no time
+    """
+    timings = []
+    for i in range(repeats):
+        start = default_timer()
+        model = MobilityModel(**dict(model_params, positions_per_level=[1] * len(model_params["positions_per_level"])))
+        populate_one_at_a_time(model, model_params["positions_per_level"], model_params["initial_vacancy_fraction"])
+        timings.append(default_timer() - start)
+    return min(timings)
+
+
+def time_steps(model, num_steps):
+    """return the wall-clock time (in seconds) it takes a model to run some number of steps"""
+    start = default_timer()
+    for i in range(num_steps):
+        model.step()
+    return default_timer() - start
+
+
+if __name__ == "__main__":
+    params = {"positions_per_level": [10000, 100000, 890000],
+              "move_probabilities": {"actor retirement probs": [0.1, 0.1, 0.1],
+                                     "vacancy move probs": [0.3, 0.1, 0.3, 0.3]},
+              "initial_vacancy_fraction": 0.2,
+              "firing_schedule": {"steps": set(), "actor retirement probs": [0.1, 0.1, 0.1]}}
+
+    bulk_time = time_initialisation(params)
+    one_at_a_time = time_one_at_a_time_initialisation(params)
+    print("initialisation, " + str(sum(params["positions_per_level"])) + " positions: "
+          + str(round(bulk_time, 2)) + "s (one position at a time: " + str(round(one_at_a_time, 2)) + "s, "
+          + str(round(one_at_a_time / bulk_time, 2)) + "x slower)")
+
+    with TemporaryDirectory() as snapshot_dir:
+        snapshot_file = os.path.join(snapshot_dir, "occupancy_snapshot.npz")
+        save_occupancy_snapshot(MobilityModel(**params), snapshot_file)
+        snapshot_params = dict(params, initial_occupancy=load_occupancy_snapshot(snapshot_file))
+    print("initialisation from snapshot: " + str(round(time_initialisation(snapshot_params), 2)) + "s")
+
+    small_params = dict(params, positions_per_level=[10, 100, 890])
+    print("10 steps, 1000 positions: " + str(round(time_steps(MobilityModel(**small_params), 10), 2)) + "s")
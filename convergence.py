@@ -0,0 +1,142 @@
+"""
+online detection of steady states in runs of MobilityModel, so that runs meant to measure equilibrium
+metrics (e.g. vacancy shares per level, chain lengths) can discard their burn-in and stop once they're stable
+metrics are (reporter, submetric) pairs naming a datacollector entry, e.g. ("percent_vacant_per_level", "Level 1")
+"""
+
+import numpy as np
+
+
+def get_segment_stats(cumulative_means, cumulative_squared_means, start, end):
+    """
+    return the mean and (ddof=1) variance of the window means of windows [start, end), in constant time, from
+    cumulative sums of the window means and of their squares (each with a leading zero)
+    """
+    n = end - start
+    mean = (cumulative_means[end] - cumulative_means[start]) / n
+    if n < 2:
+        return mean, 0.0
+    sum_of_squares = cumulative_squared_means[end] - cumulative_squared_means[start] - n * mean ** 2
+    return mean, max(sum_of_squares, 0.0) / (n - 1)
+
+
+class ConvergenceMonitor:
+    """
+    Watches chosen metrics of a running model. It sums each metric over consecutive windows of steps as the data
+    comes in, so that it never rereads the collected data; missing (NaN) values, e.g. a mean spell length while
+    no agent has a spell yet, are skipped. Every check_every steps, for each metric it looks for the earliest
+    window from which the rest of the series passes a stationarity test on the window means: "window" (first vs
+    last window mean), "batch means" (windows as batches) or "geweke" (Geweke-type test, with batch means
+    variances); windows without any values are left out. The steps before that window are the metric's burn-in.
+    Because every check tries many burn-ins, a single passing check is easily a false alarm, so the model has
+    converged only once consecutive_checks checks in a row pass for every metric; burn_in (the longest of the
+    burn-ins) is then the detected mixing time.
+    """
+
+    def __init__(self, metrics, method="geweke", window=50, tolerance=0.5, z_threshold=1.96, consecutive_checks=3,
+                 check_every=None):
+        """
+        :param metrics: list of (reporter, submetric) pairs
+        :param method: str, one of "window", "batch means", "geweke"
+        :param window: int, steps per window; also the granularity of the burn-in search
+        :param tolerance: float, largest acceptable difference of window means ("window") or confidence interval
+                          half-width ("batch means"), in the units of the metric
+        :param z_threshold: float, largest acceptable z-score ("batch means", "geweke")
+        :param consecutive_checks: int, number of checks in a row that must pass before the run has converged
+        :param check_every: int, steps between checks; defaults to window
+        """
+        if method not in {"window", "batch means", "geweke"}:
+            raise ValueError('Unknown convergence test: ' + str(method))
+        self.metrics = [tuple(m) for m in metrics]
+        self.method = method
+        self.window = window
+        self.tolerance = tolerance
+        self.z_threshold = z_threshold
+        self.consecutive_checks = consecutive_checks
+        self.check_every = window if check_every is None else check_every
+        self.steps = 0  # number of observations taken in
+        self.window_means = []  # one array of per-metric means per complete window
+        self._window_sums = np.zeros(len(self.metrics))
+        self._window_counts = np.zeros(len(self.metrics))  # number of non-missing values in the window so far
+        self._passed_checks = 0
+        self.burn_ins = {}  # per-metric burn-ins, in steps
+        self.burn_in = None  # detected mixing time, in steps
+        self.converged_at = None  # the step at which convergence was detected
+
+    def add(self, values):
+        """take in one step's values of the metrics, in the order of self.metrics; missing values are skipped"""
+        values = np.asarray(values, dtype=float)
+        present = np.isfinite(values)
+        self._window_sums += np.where(present, values, 0.0)
+        self._window_counts += present
+        self.steps += 1
+        if self.steps % self.window == 0:
+            with np.errstate(invalid="ignore"):  # a window without values gets a NaN mean
+                self.window_means.append(self._window_sums / self._window_counts)
+            self._window_sums = np.zeros(len(self.metrics))
+            self._window_counts = np.zeros(len(self.metrics))
+
+    def is_stationary(self, means, cumulative_means, cumulative_squared_means, start):
+        """run the chosen stationarity test on the window means from window start onwards"""
+        num_windows = len(means) - start
+        if self.method == "window":
+            return abs(means[start] - means[-1]) <= self.tolerance
+        if self.method == "batch means":
+            mean, variance = get_segment_stats(cumulative_means, cumulative_squared_means, start, len(means))
+            return abs(means[start] - means[-1]) <= self.z_threshold * np.sqrt(2 * variance) and \
+                self.z_threshold * np.sqrt(variance / num_windows) <= self.tolerance
+        # Geweke: first 10% of the windows against the last 50%
+        head_end = start + max(num_windows // 10, 2)
+        tail_start = len(means) - max(num_windows // 2, 2)
+        head_mean, head_variance = get_segment_stats(cumulative_means, cumulative_squared_means, start, head_end)
+        tail_mean, tail_variance = get_segment_stats(cumulative_means, cumulative_squared_means, tail_start,
+                                                     len(means))
+        variance = head_variance / (head_end - start) + tail_variance / (len(means) - tail_start)
+        if variance == 0:
+            return np.isclose(head_mean, tail_mean)
+        return abs(head_mean - tail_mean) / np.sqrt(variance) <= self.z_threshold
+
+    def find_burn_in(self, metric_index):
+        """
+        return the earliest step, a multiple of window, after which the metric is stationary (leaving at least
+        two windows with values, or four for "geweke"), or None; takes time linear in the number of windows
+        """
+        means = np.array([w[metric_index] for w in self.window_means])
+        window_numbers = np.flatnonzero(np.isfinite(means))  # leave out windows without values
+        means = means[window_numbers]
+        cumulative_means = np.concatenate([[0.0], np.cumsum(means)])
+        cumulative_squared_means = np.concatenate([[0.0], np.cumsum(means ** 2)])
+        min_windows = 4 if self.method == "geweke" else 2
+        for start in range(len(means) - min_windows + 1):
+            if self.is_stationary(means, cumulative_means, cumulative_squared_means, start):
+                return int(window_numbers[start]) * self.window
+        return None
+
+    def update(self, model):
+        """take in the model's latest collected metrics and, if it's time to, check them; True once converged"""
+        if self.converged_at is not None:
+            return True
+        self.add([model.datacollector.model_vars[reporter][-1][submetric] for reporter, submetric in self.metrics])
+        if self.steps < 2 * self.window or self.steps % self.check_every:
+            return False
+        burn_ins = [self.find_burn_in(i) for i in range(len(self.metrics))]
+        if None in burn_ins:
+            self._passed_checks = 0
+            return False
+        self._passed_checks += 1
+        self.burn_ins = dict(zip(self.metrics, burn_ins))
+        if self._passed_checks < self.consecutive_checks:
+            return False
+        self.burn_in = max(burn_ins)
+        self.converged_at = self.steps
+        return True
+
+
+def get_post_burn_in_dataframe(model):
+    """
+    return the model's collected data (as a pd.DataFrame) without the burn-in detected by its monitor;
+    all of it if the model has no monitor, or the monitor hasn't detected convergence
+    """
+    monitor = model.convergence_monitor
+    burn_in = 0 if monitor is None or monitor.burn_in is None else monitor.burn_in
+    return model.datacollector.get_model_vars_dataframe().iloc[burn_in:]
@@ -17,7 +17,7 @@ class Entity(Agent):
         self.type = ''  # type of entity: vacancy, or actor
         self.position = ''  # ID of current position
         self.log = []  # log of moves
-        self.move_probability = None  # for in-system moves; float [0,1]
+        # move_probability, for in-system moves, is a property of subclasses that looks up the model's firing schedule
         self.retire_probability = None  # for leaving the system; float [0,1]
         self._next_state = None
 
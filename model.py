@@ -10,11 +10,14 @@ Author of Python Code:
 from mesa import Model
 from agent import Actor, Position, Vacancy
 from random_simultaneous import SimultaneousActivation
+from shocks import ShockSchedule
 from mesa.datacollection import DataCollector
-from uuid import uuid4
 from numpy import mean, std
 from itertools import groupby
-from random import shuffle
+from copy import deepcopy
+import gc
+import numpy as np
+import random
 
 
 # start of datacollector functions
@@ -117,13 +120,44 @@ def get_stdev_spell_lengths(model):
     return {"Actor Sequence": std(lengths[0]), "Vacancy Chain": std(lengths[1])}
 
 
-# for the position intialiser TODO there's probably a more elegant solution that doesn't use this
-def fraction_of_list(fraction, list_length):
-    """Returns a list of bools split according to a float [0,1]"""
-    fraction_trues = int(list_length * fraction)
-    list_of_bools = fraction_trues * [True] + (list_length - fraction_trues) * [False]
-    shuffle(list_of_bools)
-    return list_of_bools
+def get_reporter_series(model, reporter, submetric):
+    """
+    return the per-step values collected so far for one submetric of a model reporter, as a numpy array
+    e.g. get_reporter_series(model, "percent_vacant_per_level", "Level 1")
+    """
+    return np.array([step[submetric] for step in model.datacollector.model_vars[reporter]], dtype=float)
+
+
+# for the position initialiser
+
+def get_vacancy_masks(positions_per_level, fraction):
+    """
+    return one boolean array per level, True where a position starts out vacant
+    each level gets int(positions * fraction) vacancies, placed by a single vectorised permutation
+    """
+    masks = []
+    for num_positions in positions_per_level:
+        mask = np.zeros(num_positions, dtype=bool)
+        mask[np.random.permutation(num_positions)[:int(num_positions * fraction)]] = True
+        masks.append(mask)
+    return masks
+
+
+def get_occupancy_snapshot(model):
+    """return the model's current occupancy as one boolean array per level (True == position is vacant)"""
+    return [np.array([p.dual[1] == "vacancy" for p in model.positions[lvl].values()], dtype=bool)
+            for lvl in range(1, model.num_levels + 1)]
+
+
+def save_occupancy_snapshot(model, filename):
+    """save the model's current occupancy to a .npz file, one array per level"""
+    np.savez(filename, *get_occupancy_snapshot(model))
+
+
+def load_occupancy_snapshot(filename):
+    """load an occupancy snapshot saved by save_occupancy_snapshot, as a list of per-level boolean arrays"""
+    with np.load(filename) as snapshot:
+        return [snapshot["arr_" + str(i)].astype(bool) for i in range(len(snapshot.files))]
 
 
 class MobilityModel(Model):
@@ -141,9 +175,9 @@ class MobilityModel(Model):
     """
 
     # TODO give agents the choice to move laterally
-    # TODO also need to introduce retirement probabilities for second level, in case of firing
 
-    def __init__(self, positions_per_level, move_probabilities, initial_vacancy_fraction, firing_schedule):
+    def __init__(self, positions_per_level, move_probabilities, initial_vacancy_fraction, firing_schedule,
+                 initial_occupancy=None, seed=None, convergence_monitor=None, progress_reporter=None):
         """
         :param positions_per_level: list of positions per level ;list of ints
                                     e.g. [10,20,30] == 10 positions in level 1, 20 in level 2, etc.
@@ -156,19 +190,44 @@ class MobilityModel(Model):
                                           "vacancy move probs": [0.3, 0..1, 0.3, 0.3]}
         :param initial_vacancy_fraction: float [0,1] telling us what percentage of positions in each level
                                          should be vacant at model initialisation
-        :param firing_schedule: dict indicating what retirement probabilities should be at given steps (form below)
+        :param firing_schedule: ShockSchedule of per-step retirement and vacancy move probabilities (see shocks.py),
+                                or a dict indicating what retirement probabilities should be at given steps
                                 this facilitates one-off changes where portions of levels are emptied of actors
                                 e.g. {"steps": {5, 10}, "level-retire probability": [(1, 0.4), (2, 0.4), (3, 0.6)]}
+        :param initial_occupancy: optional list of boolean arrays, one per level, True where a position starts out
+                                  vacant (e.g. from load_occupancy_snapshot); overrides initial_vacancy_fraction
+        :param seed: optional int seeding the random number generators that agents draw from, so that runs can
+                     be replicated and scenarios compared on common random numbers (see sweep.py); the
+                     generators are reseeded from (seed, step) at the start of every step, so that two runs
+                     from the same seed line up their draws step by step even after they've diverged
+                     NB: these are the process-wide random and numpy.random generators, so seeding a model
+                     also reseeds them for any other model stepping in the same process
+        :param convergence_monitor: optional ConvergenceMonitor (see convergence.py); the model keeps its own copy,
+                                    and stops running once the monitored metrics have converged
+        :param progress_reporter: optional ProgressReporter (see progress.py) that streams per-step summaries
         """
         super().__init__()
+        self.seed = seed
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
         # set parameters
         self.num_levels = len(positions_per_level)
         self.positions_per_level = positions_per_level
         self.move_probabilities = move_probabilities
         self.vacancy_fraction = initial_vacancy_fraction
+        if not isinstance(firing_schedule, ShockSchedule):
+            firing_schedule = ShockSchedule.from_firing_schedule(firing_schedule, move_probabilities, self.num_levels)
+        if firing_schedule.num_levels != self.num_levels or \
+                firing_schedule.actor_retirement.shape[1] != self.num_levels or \
+                firing_schedule.vacancy_moves.shape[1:] != (self.num_levels, 4):
+            raise ValueError('Firing schedule does not match the number of levels')
         self.firing_schedule = firing_schedule
+        self.actor_retirement_probs, self.vacancy_move_probs = self.firing_schedule.at(0)
 
         self.per_step_movement = {"actor": 0, "vacancy": 0}
+        self.convergence_monitor = deepcopy(convergence_monitor)
+        self.progress_reporter = progress_reporter
 
         self.schedule = SimultaneousActivation(self)
         self.running = True
@@ -182,34 +241,66 @@ class MobilityModel(Model):
                              "total mobility": get_total_mobility})
 
         # make positions and populate them with agents
-        self.positions = {i: {} for i in range(1, self.num_levels + 1)}
-        for i in range(self.num_levels):
-            vacancies = fraction_of_list(initial_vacancy_fraction, self.positions_per_level[i])
-            for j in range(self.positions_per_level[i]):
-                position_id = str(i + 1) + '-' + str(j + 1)  # position ID = level-position number
-                p = Position(position_id, self)
-                self.positions[i + 1][position_id] = p
-                # make entity
-                agent = Vacancy(uuid4(), self) if vacancies[j] else Actor(uuid4(), self)
-                self.schedule.add(agent)
-                # associate it with position
-                agent.position = p.unique_id
-                p.dual = [agent.unique_id, agent.type]
-                # update logs
-                agent.log.append(p.unique_id)
-                p.log.append(agent.unique_id)
+        if initial_occupancy is None:
+            initial_occupancy = get_vacancy_masks(self.positions_per_level, initial_vacancy_fraction)
+        elif [len(lvl) for lvl in initial_occupancy] != list(self.positions_per_level):
+            raise ValueError('Occupancy snapshot does not match positions per level')
+        self.populate(initial_occupancy)
         self.retiree_spots = set()
         self.desired_positions = []
         self.retirees = {"actor": {}, "vacancy": {}}
 
+    def populate(self, occupancy):
+        """
+        make the positions and the agents occupying them, one level at a time
+        :param occupancy: list of boolean arrays, one per level, True where a position is vacant
+        """
+        # none of the new objects is garbage, but the cyclic garbage collector would scan them over and over again
+        # while they're being made, which takes about as long as making them
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self.positions = {}
+            new_agents = []
+            for i in range(self.num_levels):
+                vacancies = np.asarray(occupancy[i], dtype=bool).tolist()
+                prefix = str(i + 1) + '-'  # position ID = level-position number
+                position_ids = [prefix + str(j) for j in range(1, len(vacancies) + 1)]
+                positions = [Position(position_id, self) for position_id in position_ids]
+                # agent IDs follow on from the model's ID counter, as next_id would hand them out
+                agent_ids = range(self.current_id + 1, self.current_id + len(vacancies) + 1)
+                self.current_id += len(vacancies)
+                agents = [Vacancy(agent_id, self) if vacant else Actor(agent_id, self)
+                          for agent_id, vacant in zip(agent_ids, vacancies)]
+                for position_id, p, agent in zip(position_ids, positions, agents):
+                    # associate entity with position, start logs
+                    agent.position = position_id
+                    agent.log = [position_id]
+                    p.dual = [agent.unique_id, agent.type]
+                    p.log = [agent.unique_id]
+                self.positions[i + 1] = dict(zip(position_ids, positions))
+                new_agents.extend(agents)
+            self.schedule.add_many(new_agents)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
     def step(self):
+        # line up the random number streams with those of other runs from the same seed
+        if self.seed is not None:
+            self.reseed(self.schedule.steps)
         # collect data before anything moves
         self.datacollector.collect(self)
+        if self.progress_reporter is not None:
+            self.progress_reporter.report(self)
+        # stop once the monitored metrics have reached a steady state
+        if self.convergence_monitor is not None and self.convergence_monitor.update(self):
+            self.running = False
+            return
         # reset the counts for per step agent movement
         self.per_step_movement = {"actor": 0, "vacancy": 0}
-        # if there are firing orders, carry them out
-        if self.schedule.steps in self.firing_schedule["steps"]:
-            self.fire(self.schedule.steps)
+        # carry out any firing orders for this step
+        self.fire(self.schedule.steps)
         # tell agents to step
         self.schedule.step()
         # update position logs
@@ -224,8 +315,11 @@ class MobilityModel(Model):
 
     # part of step
     def fire(self, step):
-        """at specified step change the retirement probability of actors in specified level"""
-        retirement_probs = self.firing_schedule["actor retirement probs"]
-        for a in self.schedule.agents:
-            if (a.type == "actor"):
-                a.move_probability = retirement_probs
+        """look up the retirement and vacancy move probabilities that the firing schedule puts in force at this step"""
+        self.actor_retirement_probs, self.vacancy_move_probs = self.firing_schedule.at(step)
+
+    def reseed(self, step):
+        """seed the process-wide random and numpy.random generators from the model's seed and the step"""
+        state = np.random.SeedSequence([self.seed, step]).generate_state(2)
+        random.seed(int(state[0]))
+        np.random.seed(int(state[1]))
@@ -10,7 +10,9 @@ the data structure (riffing off MESA's batchrunner module) is of a list containi
 }}}}]
 """
 
+import os
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import numpy as np
 import pandas as pd
 from string import punctuation
@@ -130,30 +132,43 @@ def make_time_series_figures(batchrun):
         save_figure(title_name, batchrun)
 
 
-def plot_mean_line(line_name, mean_line, stdev_line, colour_counter, linestyle):
-    """given line name, mean and associated stdev values, and a colour counter, plots a line"""
+def plot_mean_line(line_name, mean_line, stdev_line, colour_counter, linestyle, x=None, ax=None):
+    """
+    given line name, mean and associated stdev values, and a colour counter, plots a line
+    x values (steps) default to 0, 1, 2...; axes default to those of the current pyplot figure
+    """
     colours = ['r-', 'b-', 'k-', 'g-', 'c-', 'm-', 'y-']
     colour_counter = colour_counter
-    x = np.linspace(0, len(mean_line) - 1, len(mean_line))
-    plt.plot(x, mean_line, colours[colour_counter], linestyle=linestyle, label=line_name)
+    if x is None:
+        x = np.linspace(0, len(mean_line) - 1, len(mean_line))
+    if ax is None:
+        ax = plt.gca()
+    ax.plot(x, mean_line, colours[colour_counter], linestyle=linestyle, label=line_name)
     # make sure lower stdev doesn't go below zero
     stdev_lowbound = mean_line - stdev_line * 2
     stdev_lowbound[stdev_lowbound < 0] = 0
-    plt.fill_between(x, stdev_lowbound, mean_line + stdev_line * 2, alpha=0.2)
+    ax.fill_between(x, stdev_lowbound, mean_line + stdev_line * 2, alpha=0.2)
 
 
 def save_figure(metric_name, batchrun, close=True):
     """given a title for the figure and a batchrun, completes figure, saves it to .png, and closes open plots"""
-    title_name = metric_name.replace('_', ' ')
-    plt.title(title_name.title())
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.05),
-               fancybox=True, shadow=True, ncol=5,  fontsize='medium')
+    finish_figure(metric_name)
     figure_filename = "figures/" + metric_name + "_" + str(batchrun.iterations) + \
                       "runs_" + str(batchrun.max_steps) + "steps.png"
     plt.savefig(figure_filename)
     plt.close()
 
 
+def finish_figure(metric_name, ax=None):
+    """give a figure (by default the current pyplot figure) a title and a legend"""
+    if ax is None:
+        ax = plt.gca()
+    title_name = metric_name.replace('_', ' ')
+    ax.set_title(title_name.title())
+    ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.05),
+              fancybox=True, shadow=True, ncol=5,  fontsize='medium')
+
+
 def overaly_time_series_figures(batchruns):
     """
     makes time series figures and saves them to disk
@@ -188,4 +203,57 @@ def overaly_time_series_figures(batchruns):
         save_figure(k, batchruns[0])
 
 
+def group_live_runs(history):
+    """
+    group the runs in the summaries streamed from running models (see progress.py) by grid point and scenario
+    e.g. history == {run: [{"point": 0, "scenario": 1, "step": 0, "agent counts": {...}, ...}, ...], ...}
+         => {0: {1: [summaries of run, summaries of another run with point 0 and scenario 1, ...], ...}, ...}
+    runs that aren't part of a sweep have point and scenario None
+    """
+    groups = {}
+    for summaries in history.values():
+        point, scenario = summaries[0].get("point"), summaries[0].get("scenario")
+        groups.setdefault(point, {}).setdefault(scenario, []).append(summaries)
+    return groups
 
+
+def get_live_metric_dataframes(runs, metric):
+    """
+    take the per-step summaries of some runs and return a dict of pd.DataFrames, one for each submetric of a
+    metric, laid out like those of get_metrics_timeseries_dataframes (one row per run, one column per step)
+    """
+    submetrics = runs[0][0][metric].keys()
+    return {sub: pd.DataFrame([pd.Series({s["step"]: s[metric][sub] for s in summaries}) for summaries in runs])
+            for sub in submetrics}
+
+
+def make_live_figures(history, metrics=("total mobility", "agent counts")):
+    """
+    makes time series figures of runs that are still going, from the summaries they've streamed so far, and
+    saves them to disk, overwriting the previous versions; returns the figure filenames
+    there's one figure per metric and grid point; as in overaly_time_series_figures, each scenario gets its own
+    lines, one per submetric, told apart by linestyle
+    uses matplotlib's Figure API rather than pyplot, so that it can run off the main thread
+    """
+    os.makedirs("figures", exist_ok=True)
+    linestyles = ["-", "--", ":", "-."]
+    figure_filenames = []
+    for metric in metrics:
+        for point, scenarios in group_live_runs(history).items():
+            fig = Figure()
+            ax = fig.subplots()
+            for scenario_counter, scenario in enumerate(sorted(scenarios.keys(), key=str)):
+                colour_counter = 0
+                for sub, df in get_live_metric_dataframes(scenarios[scenario], metric).items():
+                    df = df.sort_index(axis=1)
+                    mean_line = df.mean(axis=0)
+                    stdev_line = df.std(axis=0).fillna(0)  # only one run so far == no spread
+                    line_name = sub if scenario is None else sub + ", scenario " + str(scenario)
+                    plot_mean_line(line_name, mean_line.values, stdev_line.values, colour_counter,
+                                   linestyles[scenario_counter % len(linestyles)], x=mean_line.index.values, ax=ax)
+                    colour_counter += 1
+            figure_name = metric if point is None else metric + ", point " + str(point)
+            finish_figure(figure_name, ax)
+            figure_filenames.append("figures/live_" + figure_name.replace(', ', '_').replace(' ', '_') + ".png")
+            fig.savefig(figure_filenames[-1])
+    return figure_filenames
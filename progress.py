@@ -0,0 +1,224 @@
+"""
+live progress and metrics for long (batch) runs of MobilityModel
+models in worker processes put per-step summaries on a bounded multiprocessing queue through a ProgressReporter;
+putting only hands the summary to the queue's feeder thread, and a summary that doesn't fit is dropped, so the
+simulation never waits on I/O. A ProgressServer drains the queue in the background and serves the summaries over
+HTTP on localhost, as JSON snapshots or as a live stream of server-sent events, and redraws figures on request
+e.g.
+    queue = multiprocessing.Queue(maxsize=10000)
+    threading.Thread(target=run_progress_server, args=(queue,), daemon=True).start()
+    sweep(..., progress_queue=queue)  # then GET http://127.0.0.1:8765/stream
+"""
+
+import asyncio
+import json
+import logging
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Full
+from timeit import default_timer
+from plotters import make_live_figures
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_progress_queue = None  # the queue ProgressReporters in this process report to, see set_progress_queue
+
+
+def set_progress_queue(queue):
+    """
+    set the queue that models in this process report their progress to; a multiprocessing.Queue can't be
+    pickled into a task, so hand it to worker processes with ProcessPoolExecutor(initializer=set_progress_queue,
+    initargs=(queue,)), as sweep does
+    """
+    global _progress_queue
+    _progress_queue = queue
+
+
+def get_progress_queue():
+    """return the queue set by set_progress_queue, or None"""
+    return _progress_queue
+
+
+def get_peak_memory_usage():
+    """return the peak resident memory of this process in MB, or None if the platform can't tell us"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+
+class ProgressReporter:
+    """puts per-step summaries of one model run on a queue, dropping them rather than waiting if the queue is full"""
+
+    def __init__(self, queue, labels, every=1):
+        """
+        :param queue: a bounded multiprocessing.Queue, e.g. multiprocessing.Queue(maxsize=10000)
+        :param labels: dict identifying the run, copied into every summary, e.g. {"point": 3, "scenario": 1,
+                       "seed": 12}; summaries of runs with the same "point" and "scenario" are plotted together
+        :param every: int, report every this many steps
+        """
+        self.queue = queue
+        self.labels = dict(labels, run=", ".join(str(k) + " " + str(v) for k, v in labels.items()))
+        self.every = every
+        self._last_report = None  # (step, time) of the last report
+
+    def report(self, model):
+        """put a summary of the model's latest collected data on the queue, if it's time to"""
+        step = model.schedule.steps
+        if step % self.every:
+            return
+        now = default_timer()
+        step_rate = None
+        if self._last_report is not None and now > self._last_report[1]:
+            step_rate = (step - self._last_report[0]) / (now - self._last_report[1])
+        self._last_report = (step, now)
+        summary = dict(self.labels)
+        summary.update({"step": step,
+                        "total mobility": model.datacollector.model_vars["total mobility"][-1],
+                        "agent counts": model.datacollector.model_vars["agent_counts"][-1],
+                        "steps per second": step_rate,
+                        "peak memory (MB)": get_peak_memory_usage()})
+        try:
+            self.queue.put_nowait(summary)
+        except Full:
+            pass
+
+
+class ProgressServer:
+    """
+    Collects the summaries that ProgressReporters put on a queue and serves them on localhost:
+        GET /summary  latest summary of every run, as JSON
+        GET /history  the latest history_length summaries of every run, as JSON
+        GET /stream   summaries as they arrive, as server-sent events
+        GET /figures  redraw the live figures (see plotters.make_live_figures) and return their filenames
+    """
+
+    def __init__(self, queue, host="127.0.0.1", port=8765, figure_interval=None, history_length=1000,
+                 stream_buffer=1000):
+        """
+        :param queue: the queue the ProgressReporters put summaries on
+        :param figure_interval: optional float, seconds between automatic redraws of the live figures
+        :param history_length: int, number of summaries kept per run; older ones are dropped
+        :param stream_buffer: int, number of summaries held for each stream; a client that falls this far behind
+                              misses the summaries that don't fit
+        """
+        self.queue = queue
+        self.host = host
+        self.port = port
+        self.figure_interval = figure_interval
+        self.history_length = history_length
+        self.stream_buffer = stream_buffer
+        self.history = {}  # run : deque of its latest summaries, in order of arrival
+        self._subscribers = set()  # one asyncio.Queue per open stream
+        self._queue_reader = ThreadPoolExecutor(max_workers=1)
+        self._plotter = ThreadPoolExecutor(max_workers=1)  # draw one set of figures at a time
+
+    async def serve(self):
+        """serve requests and drain the queue until cancelled"""
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        tasks = [server.serve_forever(), self.drain_queue()]
+        if self.figure_interval is not None:
+            tasks.append(self.refresh_figures())
+        async with server:
+            await asyncio.gather(*tasks)
+
+    async def drain_queue(self):
+        """move summaries from the queue into the history and on to any open streams"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                summary = await loop.run_in_executor(self._queue_reader, self.queue.get, True, 0.5)
+            except Empty:
+                continue
+            if summary["run"] not in self.history:
+                self.history[summary["run"]] = deque(maxlen=self.history_length)
+            self.history[summary["run"]].append(summary)
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(summary)
+                except asyncio.QueueFull:  # a slow client; it misses this summary rather than holding up the rest
+                    pass
+
+    def subscribe(self):
+        """return a new bounded queue that drain_queue puts every incoming summary on, until it is unsubscribed"""
+        subscriber = asyncio.Queue(maxsize=self.stream_buffer)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    async def refresh_figures(self):
+        """redraw the live figures every figure_interval seconds, logging rather than raising any failure"""
+        while True:
+            await asyncio.sleep(self.figure_interval)
+            try:
+                await self.draw_figures()
+            except Exception:
+                logger.exception("Could not redraw the live figures")
+
+    async def draw_figures(self):
+        """redraw the live figures off the event loop, from a copy of the history; return their filenames"""
+        if not self.history:
+            return []
+        history = {run: list(summaries) for run, summaries in self.history.items()}
+        return await asyncio.get_running_loop().run_in_executor(self._plotter, make_live_figures, history)
+
+    async def handle(self, reader, writer):
+        """answer one HTTP request"""
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in {b"\r\n", b"\n", b""}:  # skip the headers
+                pass
+            parts = request_line.decode().split()
+            path = parts[1] if len(parts) > 1 else ""
+            try:
+                if path == "/stream":
+                    await self.stream(writer)
+                elif path == "/summary":
+                    await self.respond(writer, {run: summaries[-1] for run, summaries in self.history.items()})
+                elif path == "/history":
+                    await self.respond(writer, {run: list(summaries) for run, summaries in self.history.items()})
+                elif path == "/figures":
+                    await self.respond(writer, await self.draw_figures())
+                else:
+                    await self.respond(writer, {"error": "unknown path " + path}, status="404 Not Found")
+            except ConnectionError:
+                raise
+            except Exception as e:
+                logger.exception("Could not answer request for " + path)
+                await self.respond(writer, {"error": repr(e)}, status="500 Internal Server Error")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def respond(writer, content, status="200 OK"):
+        """write a JSON response"""
+        body = json.dumps(content, default=str).encode()
+        writer.write(("HTTP/1.1 " + status + "\r\nContent-Type: application/json\r\nContent-Length: "
+                      + str(len(body)) + "\r\nConnection: close\r\n\r\n").encode() + body)
+        await writer.drain()
+
+    async def stream(self, writer):
+        """write summaries to the client as server-sent events, as they arrive, until the client goes away"""
+        subscriber = self.subscribe()
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n\r\n")
+            await writer.drain()
+            while True:
+                summary = await subscriber.get()
+                writer.write(("data: " + json.dumps(summary, default=str) + "\n\n").encode())
+                await writer.drain()
+        finally:
+            self._subscribers.discard(subscriber)
+
+
+def run_progress_server(queue, host="127.0.0.1", port=8765, figure_interval=None, history_length=1000,
+                        stream_buffer=1000):
+    """run a ProgressServer until interrupted"""
+    asyncio.run(ProgressServer(queue, host, port, figure_interval, history_length, stream_buffer).serve())
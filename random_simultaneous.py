@@ -56,6 +56,13 @@ class BaseScheduler:
         """
         self._agents[agent.unique_id] = agent
 
+    def add_many(self, agents: List[Agent]) -> None:
+        """ Add several Agent objects to the schedule in one go, in the given order.
+        Args:
+            agents: A list of Agents to be added to the schedule.
+        """
+        self._agents.update((agent.unique_id, agent) for agent in agents)
+
     def remove(self, agent: Agent) -> None:
         """ Remove all instances of a given agent from the schedule.
         Args:
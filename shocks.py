@@ -0,0 +1,138 @@
+"""
+firing schedules and other shocks to the mobility system, stored as precomputed per-step probability tables
+the model looks up the row for the current step, so agents read the probabilities in force without any
+per-agent state being rewritten when a shock starts or ends
+"""
+
+import numpy as np
+
+
+class ShockSchedule:
+    """
+    Two tables indexed by step: actor retirement probabilities, one per level, with shape (steps, levels), and
+    vacancy move probabilities, one vector per level in order of [don't move, retire, move in same level, move
+    down level], with shape (steps, levels, 4). Row t holds the probabilities in force at step t. Steps past the
+    last row use the last row, so a shock without an end lasts for the rest of the run, while a shock with an end
+    reverts to whatever was in force before it. Where shocks overlap, the one added later wins.
+    """
+
+    def __init__(self, move_probabilities, num_levels):
+        """
+        :param move_probabilities: the baseline move probabilities, in the form MobilityModel takes them
+        :param num_levels: int, number of levels in the hierarchy
+        """
+        if len(move_probabilities["actor retirement probs"]) != num_levels:
+            raise ValueError('Need one actor retirement probability per level')
+        self.num_levels = num_levels
+        self.actor_retirement = np.array([move_probabilities["actor retirement probs"]], dtype=float)
+        self.vacancy_moves = np.tile(np.asarray(move_probabilities["vacancy move probs"], dtype=float),
+                                     (1, num_levels, 1))
+
+    @classmethod
+    def from_firing_schedule(cls, firing_schedule, move_probabilities, num_levels):
+        """
+        make a ShockSchedule from a firing schedule dict, e.g.
+        {"steps": {5, 10}, "level-retire probability": [(1, 0.4), (2, 0.4), (3, 0.6)]} == one-off purges of
+        the given levels at steps 5 and 10, or {"steps": {5}, "actor retirement probs": [0.4, 0.4, 0.6]} == from
+        step 5 onwards, actors retire with the given per-level probabilities (this form takes at most one step)
+        NB: the latter used to be set only on the actors present at the firing step, so that actors entering
+        later retired with the baseline probabilities and the shock faded as that cohort left; now the shocked
+        probabilities apply to every actor, new entrants included, for the rest of the run
+        """
+        schedule = cls(move_probabilities, num_levels)
+        if "level-retire probability" in firing_schedule:
+            for step in sorted(firing_schedule["steps"]):
+                schedule.purge(firing_schedule["level-retire probability"], step)
+        elif len(firing_schedule["steps"]) > 1:
+            raise ValueError('"actor retirement probs" last for the rest of the run, so they take only one step; '
+                             'for several shocks, build a ShockSchedule')
+        elif firing_schedule["steps"]:
+            all_levels = enumerate(firing_schedule["actor retirement probs"], start=1)
+            schedule.retirement_shock(all_levels, min(firing_schedule["steps"]))
+        return schedule
+
+    def at(self, step):
+        """return the actor retirement and vacancy move probabilities in force at some step"""
+        row = min(step, len(self.actor_retirement) - 1)
+        return self.actor_retirement[row], self.vacancy_moves[row]
+
+    def retirement_shock(self, level_probabilities, start, end=None):
+        """
+        set the retirement probabilities of actors in some levels, from step start up to (not including) step end
+        :param level_probabilities: dict, or iterable of (level, probability) pairs, e.g. [(1, 0.4), (3, 0.6)]
+        :param end: int, or None if the shock should last for the rest of the run
+        """
+        rows = self._get_rows(start, end)
+        for level, probability in dict(level_probabilities).items():
+            self.actor_retirement[rows, self._get_level_index(level)] = probability
+
+    def retirement_ramp(self, level, start, end, start_probability, end_probability, hold=False):
+        """
+        change the retirement probability of actors in a level linearly, step by step, from start_probability at
+        step start to end_probability at step end - 1; if hold, end_probability then lasts for the rest of the run
+        """
+        level_index = self._get_level_index(level)
+        rows = self._get_rows(start, end)  # may replace the tables with longer ones, so get the rows first
+        self.actor_retirement[rows, level_index] = np.linspace(start_probability, end_probability, end - start)
+        if hold:
+            self.retirement_shock({level: end_probability}, end)
+
+    def purge(self, level_probabilities, step):
+        """for one step only, set the retirement probabilities of actors in some levels"""
+        self.retirement_shock(level_probabilities, step, step + 1)
+
+    def vacancy_move_shock(self, level_probabilities, start, end=None):
+        """
+        set the move probabilities of vacancies in some levels, from step start up to (not including) step end
+        :param level_probabilities: dict, or iterable of (level, probability vector) pairs,
+                                    e.g. {2: [0.5, 0.1, 0.2, 0.2]}
+        :param end: int, or None if the shock should last for the rest of the run
+        """
+        rows = self._get_rows(start, end)
+        for level, probabilities in dict(level_probabilities).items():
+            if not np.isclose(sum(probabilities), 1.0):
+                raise ValueError('Vacancy move probabilities must sum to one')
+            self.vacancy_moves[rows, self._get_level_index(level)] = probabilities
+
+    def vacancy_move_ramp(self, level, start, end, start_probabilities, end_probabilities, hold=False):
+        """
+        change the move probabilities of vacancies in a level linearly, step by step, from start_probabilities at
+        step start to end_probabilities at step end - 1; if hold, end_probabilities then last for the rest of the
+        run; every step's vector is a mix of the two end points, so it still sums to one
+        """
+        for probabilities in (start_probabilities, end_probabilities):
+            if not np.isclose(sum(probabilities), 1.0):
+                raise ValueError('Vacancy move probabilities must sum to one')
+        level_index = self._get_level_index(level)
+        weights = np.linspace(0.0, 1.0, end - start)[:, np.newaxis]
+        rows = self._get_rows(start, end)  # may replace the tables with longer ones, so get the rows first
+        self.vacancy_moves[rows, level_index] = \
+            (1 - weights) * np.asarray(start_probabilities, dtype=float) + weights * np.asarray(end_probabilities)
+        if hold:
+            self.vacancy_move_shock({level: end_probabilities}, end)
+
+    def _get_level_index(self, level):
+        """return the table column of a level (levels count from 1, at the top of the hierarchy)"""
+        if not 1 <= level <= self.num_levels:
+            raise ValueError('Level ' + str(level) + ' is not between 1 and ' + str(self.num_levels))
+        return level - 1
+
+    def _get_rows(self, start, end):
+        """
+        return the slice of table rows covering steps [start, end), first extending the tables so that the
+        row after the slice keeps whatever was in force at step end
+        """
+        if end is None:
+            self._extend(start + 1)
+            return slice(start, None)
+        self._extend(end + 1)
+        return slice(start, end)
+
+    def _extend(self, num_rows):
+        """make sure the tables have at least num_rows rows, repeating their last rows"""
+        extra_rows = num_rows - len(self.actor_retirement)
+        if extra_rows > 0:
+            self.actor_retirement = np.concatenate([self.actor_retirement,
+                                                    np.repeat(self.actor_retirement[-1:], extra_rows, axis=0)])
+            self.vacancy_moves = np.concatenate([self.vacancy_moves,
+                                                 np.repeat(self.vacancy_moves[-1:], extra_rows, axis=0)])
@@ -0,0 +1,100 @@
+"""
+parameter sweeps over MobilityModel that compare pairs of scenarios (e.g. without and with firings)
+each replicate runs both scenarios from the same seed, i.e. on common random numbers; models reseed their
+generators from (seed, step) every step, so the scenarios' draws line up step by step and much of the noise
+cancels out of the difference between them (less so within a step, once their agent populations differ)
+replicates are added to a grid point only until the (Student t) confidence intervals of the chosen metrics'
+differences are tight enough
+metrics are (reporter, submetric) pairs naming a datacollector entry, e.g. ("percent_vacant_per_level", "Level 1")
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import numpy as np
+from scipy.stats import t
+from model import MobilityModel, get_reporter_series
+from progress import ProgressReporter, get_progress_queue, set_progress_queue
+
+
+def make_grid(variable_parameters):
+    """
+    return a list of dicts, one per combination of parameter values
+    e.g. {"initial_vacancy_fraction": [0.1, 0.2], "firing_schedule": [f1, f2]} => four dicts
+    """
+    names = list(variable_parameters.keys())
+    return [dict(zip(names, values)) for values in product(*variable_parameters.values())]
+
+
+def run_replicate(model_params, max_steps, seed, metrics, burn_in=0, progress_labels=None, progress_every=1):
+    """
+    run one seeded model for max_steps and return a list of the post-burn-in means of the metrics
+    if this process has a progress queue (see progress.set_progress_queue), the model streams a summary to it
+    every progress_every steps, labelled with progress_labels and the seed
+    """
+    progress_queue = get_progress_queue()
+    progress_reporter = None if progress_queue is None else \
+        ProgressReporter(progress_queue, dict(progress_labels or {}, seed=seed), progress_every)
+    model = MobilityModel(**model_params, seed=seed, progress_reporter=progress_reporter)
+    for i in range(max_steps):
+        model.step()
+    return [np.nanmean(get_reporter_series(model, *m)[burn_in:]) for m in metrics]
+
+
+def get_confidence_half_widths(differences, confidence):
+    """return the half-widths of the Student t confidence intervals of the column means"""
+    quantile = t.ppf(0.5 + confidence / 2, len(differences) - 1)
+    return quantile * differences.std(axis=0, ddof=1) / np.sqrt(len(differences))
+
+
+def run_grid_point(model_params, scenarios, max_steps, metrics, tolerance, confidence=0.95, min_replicates=5,
+                   max_replicates=100, burn_in=0, base_seed=0, point=None, progress_every=1):
+    """
+    run paired replicates of two scenarios on common random numbers, until the confidence interval of the
+    difference (second scenario minus first) of every metric has a half-width of at most tolerance
+    :param model_params: dict of MobilityModel parameters shared by both scenarios
+    :param scenarios: pair of dicts of parameters that differ between the scenarios
+                      e.g. ({"firing_schedule": no_firings}, {"firing_schedule": firings})
+    :param tolerance: float, or list of floats (one per metric), of acceptable confidence interval half-widths
+    :param min_replicates: int, replicates to run before checking the confidence intervals (at least two)
+    :param max_replicates: int, replicates after which to stop regardless
+    :param base_seed: int, replicate r of every scenario (and every grid point) is seeded with base_seed + r
+    :param point: optional label of the grid point, for the progress summaries models stream (see run_replicate)
+    :param progress_every: int, steps between progress summaries
+    :return: dict of per-metric scenario means, mean differences and their half-widths, and number of replicates
+    """
+    outcomes = ([], [])
+    half_widths = np.full(len(metrics), np.inf)
+    replicates = 0
+    while replicates < max_replicates:
+        for scenario_number, (outcome, scenario) in enumerate(zip(outcomes, scenarios)):
+            labels = {"scenario": scenario_number} if point is None else {"point": point, "scenario": scenario_number}
+            outcome.append(run_replicate(dict(model_params, **scenario), max_steps, base_seed + replicates, metrics,
+                                         burn_in, labels, progress_every))
+        replicates += 1
+        if replicates >= max(min_replicates, 2):
+            differences = np.array(outcomes[1]) - np.array(outcomes[0])
+            half_widths = get_confidence_half_widths(differences, confidence)
+            if np.all(half_widths <= tolerance):
+                break
+    first_means, second_means = np.mean(outcomes[0], axis=0), np.mean(outcomes[1], axis=0)
+    return {"Replicates": replicates,
+            "Scenario Means": [dict(zip(metrics, first_means)), dict(zip(metrics, second_means))],
+            "Mean Difference": dict(zip(metrics, second_means - first_means)),
+            "Half-Width": dict(zip(metrics, half_widths))}
+
+
+def sweep(fixed_parameters, variable_parameters, scenarios, max_steps, metrics, tolerance, processes=None,
+          progress_queue=None, **grid_point_kwargs):
+    """
+    run run_grid_point for every combination of variable_parameters, spreading grid points across worker
+    processes; returns the results in grid order, each with the parameters of its grid point
+    to watch the sweep live, pass a bounded multiprocessing.Queue as progress_queue and serve it with
+    progress.run_progress_server; the workers get the queue when they start, and models never wait on it
+    """
+    grid = make_grid(variable_parameters)
+    with ProcessPoolExecutor(max_workers=processes, initializer=set_progress_queue,
+                             initargs=(progress_queue,)) as pool:
+        futures = [pool.submit(run_grid_point, dict(fixed_parameters, **point), scenarios, max_steps, metrics,
+                               tolerance, point=i, **grid_point_kwargs)
+                   for i, point in enumerate(grid)]
+        return [dict(future.result(), Parameters=point) for point, future in zip(grid, futures)]
@@ -0,0 +1,86 @@
+"""
+tests for the steady-state detection in convergence.py
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("mesa")
+from convergence import ConvergenceMonitor, get_post_burn_in_dataframe
+from model import MobilityModel
+
+STEP_THEN_FLAT = [10.0] * 50 + [1.0] * 200
+TREND = [float(i) for i in range(250)]
+
+
+def feed(monitor, series):
+    for value in series:
+        monitor.add([value])
+    return monitor
+
+
+def make_model(seed=1, convergence_monitor=None, **params):
+    """a small MobilityModel that starts out without vacancies"""
+    model_params = {"positions_per_level": [5, 20, 40],
+                    "move_probabilities": {"actor retirement probs": [0.1, 0.05, 0.05],
+                                           "vacancy move probs": [0.3, 0.1, 0.3, 0.3]},
+                    "initial_vacancy_fraction": 0.0,
+                    "firing_schedule": {"steps": set(), "actor retirement probs": [0.1, 0.05, 0.05]}}
+    model_params.update(params)
+    return MobilityModel(**model_params, seed=seed, convergence_monitor=convergence_monitor)
+
+
+def run_until_converged(model, max_steps=1500):
+    while model.running and model.schedule.steps < max_steps:
+        model.step()
+    return model
+
+
+@pytest.mark.parametrize("method", ["window", "batch means"])
+def test_burn_in_of_step_then_flat_series(method):
+    monitor = feed(ConvergenceMonitor([("r", "s")], method=method, window=10, tolerance=0.5), STEP_THEN_FLAT)
+    assert monitor.find_burn_in(0) == 50
+
+
+@pytest.mark.parametrize("method", ["window", "batch means", "geweke"])
+def test_trend_never_converges(method):
+    monitor = feed(ConvergenceMonitor([("r", "s")], method=method, window=10, tolerance=0.5), TREND)
+    assert monitor.find_burn_in(0) is None
+
+
+@pytest.mark.parametrize("method", ["window", "batch means", "geweke"])
+def test_missing_values_are_skipped(method):
+    with_missing = feed(ConvergenceMonitor([("r", "s")], method=method, window=10, tolerance=0.5),
+                        [np.nan] * 10 + [1.0, np.nan] * 5 + [1.0] * 200)
+    assert with_missing.find_burn_in(0) == 10  # the first window has no values
+    assert np.isclose(with_missing.window_means[1][0], 1.0)
+
+
+def test_convergence_needs_consecutive_passing_checks():
+    # nobody retires and vacancies stay put, so the vacancy count never changes
+    frozen = {"move_probabilities": {"actor retirement probs": [0.0, 0.0, 0.0], "vacancy move probs": [1, 0, 0, 0]},
+              "firing_schedule": {"steps": set(), "actor retirement probs": [0.0, 0.0, 0.0]}}
+    monitor = ConvergenceMonitor([["agent_counts", "Vacancy Count"]], method="window", window=10, consecutive_checks=3)
+    model = run_until_converged(make_model(convergence_monitor=monitor, **frozen))
+    assert model.convergence_monitor.converged_at == 40  # checks at steps 20, 30 and 40 pass
+    assert model.convergence_monitor.burn_in == 0
+    assert model.convergence_monitor.burn_ins == {("agent_counts", "Vacancy Count"): 0}
+
+
+def test_model_stops_and_drops_burn_in():
+    monitor = ConvergenceMonitor([("agent_counts", "Vacancy Count")], method="batch means", window=10, tolerance=2)
+    model = run_until_converged(make_model(convergence_monitor=monitor))
+    monitor = model.convergence_monitor
+    assert not model.running
+    assert monitor.burn_in > 0  # vacancies take a while to build up from none
+    assert model.schedule.steps == monitor.converged_at - 1  # the converging step collects data, then stops
+    post_burn_in = get_post_burn_in_dataframe(model)
+    assert len(post_burn_in) == monitor.converged_at - monitor.burn_in
+    assert post_burn_in.index[0] == monitor.burn_in
+
+
+def test_post_burn_in_dataframe_without_monitor():
+    model = make_model()
+    for i in range(5):
+        model.step()
+    assert len(get_post_burn_in_dataframe(model)) == 5
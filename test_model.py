@@ -0,0 +1,70 @@
+"""
+tests for the initialisation of MobilityModel and its occupancy snapshots
+"""
+
+import os
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("mesa")
+from model import MobilityModel, get_vacancy_masks, get_occupancy_snapshot, save_occupancy_snapshot, \
+    load_occupancy_snapshot
+
+PARAMS = {"positions_per_level": [5, 20, 40],
+          "move_probabilities": {"actor retirement probs": [0.1, 0.1, 0.1],
+                                 "vacancy move probs": [0.3, 0.1, 0.3, 0.3]},
+          "initial_vacancy_fraction": 0.2,
+          "firing_schedule": {"steps": set(), "actor retirement probs": [0.1, 0.1, 0.1]}}
+
+
+def test_vacancy_masks_have_requested_fraction():
+    masks = get_vacancy_masks([10, 20, 35], 0.2)
+    assert [len(m) for m in masks] == [10, 20, 35]
+    assert [int(m.sum()) for m in masks] == [2, 4, 7]
+
+
+def test_every_position_and_its_dual_point_at_each_other():
+    model = MobilityModel(**PARAMS)
+    agents = {a.unique_id: a for a in model.schedule.agents}
+    assert len(agents) == sum(PARAMS["positions_per_level"])
+    for level, positions in model.positions.items():
+        assert list(positions.keys()) == [str(level) + '-' + str(j + 1) for j in range(len(positions))]
+        for position_id, p in positions.items():
+            agent = agents[p.dual[0]]
+            assert p.dual[1] == agent.type
+            assert agent.position == position_id
+            assert agent.log == [position_id]
+            assert p.log == [agent.unique_id]
+    vacancies = [int(m.sum()) for m in get_occupancy_snapshot(model)]
+    assert vacancies == [1, 4, 8]
+
+
+def test_new_agents_get_fresh_ids():
+    model = MobilityModel(**PARAMS)
+    initial_ids = {a.unique_id for a in model.schedule.agents}
+    assert model.next_id() not in initial_ids
+
+
+def test_initial_occupancy_is_honoured():
+    masks = [np.array([True] * 5), np.array([False] * 20), np.arange(40) % 3 == 0]
+    model = MobilityModel(**dict(PARAMS, initial_occupancy=masks))
+    for snapshot_mask, mask in zip(get_occupancy_snapshot(model), masks):
+        assert np.array_equal(snapshot_mask, mask)
+
+
+def test_mismatched_occupancy_is_rejected():
+    masks = [np.array([True] * 5), np.array([False] * 20), np.array([False] * 39)]
+    with pytest.raises(ValueError):
+        MobilityModel(**dict(PARAMS, initial_occupancy=masks))
+
+
+def test_snapshot_round_trip(tmp_path):
+    model = MobilityModel(**PARAMS)
+    for i in range(3):
+        model.step()
+    filename = os.path.join(str(tmp_path), "snapshot.npz")
+    save_occupancy_snapshot(model, filename)
+    restarted = MobilityModel(**dict(PARAMS, initial_occupancy=load_occupancy_snapshot(filename)))
+    for restarted_mask, mask in zip(get_occupancy_snapshot(restarted), get_occupancy_snapshot(model)):
+        assert restarted_mask.dtype == bool
+        assert np.array_equal(restarted_mask, mask)
@@ -0,0 +1,61 @@
+"""
+tests for the progress reporting in progress.py and the grouping of live runs in plotters.py
+"""
+
+import asyncio
+from queue import Queue
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("pandas")
+pytest.importorskip("mesa")
+from model import MobilityModel
+from plotters import group_live_runs
+from progress import ProgressReporter, ProgressServer
+
+PARAMS = {"positions_per_level": [5, 20, 40],
+          "move_probabilities": {"actor retirement probs": [0.1, 0.1, 0.1],
+                                 "vacancy move probs": [0.3, 0.1, 0.3, 0.3]},
+          "initial_vacancy_fraction": 0.2,
+          "firing_schedule": {"steps": set(), "actor retirement probs": [0.1, 0.1, 0.1]}}
+
+
+def test_reporter_labels_summaries_and_drops_when_full():
+    queue = Queue(maxsize=1)
+    reporter = ProgressReporter(queue, {"point": 3, "scenario": 1, "seed": 12}, every=2)
+    model = MobilityModel(**PARAMS, seed=12, progress_reporter=reporter)
+    for i in range(3):  # reports at step 0; step 1 isn't a reporting step; at step 2 the queue is full
+        model.step()
+    summary = queue.get_nowait()
+    assert queue.empty()
+    assert summary["run"] == "point 3, scenario 1, seed 12"
+    assert (summary["point"], summary["scenario"], summary["step"]) == (3, 1, 0)
+    assert summary["agent counts"] == model.datacollector.model_vars["agent_counts"][0]
+
+
+def test_slow_stream_misses_summaries_without_holding_up_the_server():
+    async def drain_briefly(server):
+        subscriber = server.subscribe()
+        try:
+            await asyncio.wait_for(server.drain_queue(), 0.2)
+        except asyncio.TimeoutError:
+            pass
+        return subscriber
+
+    queue = Queue()
+    for step in range(3):
+        queue.put({"run": "a", "step": step})
+    server = ProgressServer(queue, stream_buffer=2)
+    subscriber = asyncio.run(drain_briefly(server))
+    assert [s["step"] for s in server.history["a"]] == [0, 1, 2]
+    assert subscriber.qsize() == 2
+    assert subscriber.get_nowait()["step"] == 0
+
+
+def test_live_runs_grouped_by_point_and_scenario():
+    history = {"a": [{"point": 0, "scenario": 0}], "b": [{"point": 0, "scenario": 1}],
+               "c": [{"point": 0, "scenario": 1}], "d": [{"step": 0}]}
+    groups = group_live_runs(history)
+    assert len(groups[0][0]) == 1
+    assert len(groups[0][1]) == 2
+    assert len(groups[None][None]) == 1
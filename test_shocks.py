@@ -0,0 +1,119 @@
+"""
+tests for the per-step probability tables in shocks.py
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from shocks import ShockSchedule
+
+BASELINE = {"actor retirement probs": [0.1, 0.1, 0.1], "vacancy move probs": [0.3, 0.1, 0.3, 0.3]}
+
+
+def make_schedule():
+    return ShockSchedule(BASELINE, 3)
+
+
+def test_baseline_holds_at_every_step():
+    schedule = make_schedule()
+    for step in (0, 1, 1000):
+        actor_probs, vacancy_probs = schedule.at(step)
+        assert np.allclose(actor_probs, [0.1, 0.1, 0.1])
+        assert np.allclose(vacancy_probs, [[0.3, 0.1, 0.3, 0.3]] * 3)
+
+
+def test_bounded_shock_reverts_afterwards():
+    schedule = make_schedule()
+    schedule.retirement_shock({2: 0.5}, 5, 8)
+    assert np.allclose(schedule.at(4)[0], [0.1, 0.1, 0.1])
+    assert all(np.allclose(schedule.at(step)[0], [0.1, 0.5, 0.1]) for step in (5, 6, 7))
+    assert np.allclose(schedule.at(8)[0], [0.1, 0.1, 0.1])
+    assert np.allclose(schedule.at(1000)[0], [0.1, 0.1, 0.1])
+
+
+def test_open_ended_shock_lasts_for_the_rest_of_the_run():
+    schedule = make_schedule()
+    schedule.retirement_shock([(1, 0.4), (3, 0.6)], 5)
+    assert np.allclose(schedule.at(4)[0], [0.1, 0.1, 0.1])
+    assert np.allclose(schedule.at(5)[0], [0.4, 0.1, 0.6])
+    assert np.allclose(schedule.at(1000)[0], [0.4, 0.1, 0.6])
+
+
+def test_last_shock_wins_on_overlap():
+    schedule = make_schedule()
+    schedule.retirement_shock({1: 0.4}, 0, 10)
+    schedule.retirement_shock({1: 0.9}, 5, 15)
+    assert np.isclose(schedule.at(4)[0][0], 0.4)
+    assert np.isclose(schedule.at(5)[0][0], 0.9)
+    assert np.isclose(schedule.at(14)[0][0], 0.9)
+    assert np.isclose(schedule.at(15)[0][0], 0.1)
+
+
+def test_bounded_shock_after_open_ended_shock_reverts_to_it():
+    schedule = make_schedule()
+    schedule.retirement_shock({1: 0.4}, 2)
+    schedule.purge({1: 0.9}, 10)
+    assert np.isclose(schedule.at(10)[0][0], 0.9)
+    assert np.isclose(schedule.at(11)[0][0], 0.4)
+
+
+def test_retirement_ramp_values():
+    schedule = make_schedule()
+    schedule.retirement_ramp(2, 10, 15, 0.1, 0.5)
+    assert np.allclose([schedule.at(step)[0][1] for step in range(9, 16)], [0.1, 0.1, 0.2, 0.3, 0.4, 0.5, 0.1])
+    schedule.retirement_ramp(3, 20, 23, 0.2, 0.4, hold=True)
+    assert np.isclose(schedule.at(21)[0][2], 0.3)
+    assert np.isclose(schedule.at(1000)[0][2], 0.4)
+
+
+def test_vacancy_move_ramp_sums_to_one():
+    schedule = make_schedule()
+    schedule.vacancy_move_ramp(1, 0, 5, [0.3, 0.1, 0.3, 0.3], [0.7, 0.1, 0.1, 0.1])
+    assert np.allclose(schedule.at(2)[1][0], [0.5, 0.1, 0.2, 0.2])
+    assert np.allclose(schedule.vacancy_moves[:5, 0].sum(axis=1), 1)
+    assert np.allclose(schedule.at(5)[1][0], [0.3, 0.1, 0.3, 0.3])
+
+
+def test_vacancy_moves_must_sum_to_one():
+    with pytest.raises(ValueError):
+        make_schedule().vacancy_move_shock({1: [0.5, 0.5, 0.5, 0.5]}, 0)
+
+
+def test_retirement_probs_must_match_levels():
+    with pytest.raises(ValueError):
+        ShockSchedule(BASELINE, 4)
+
+
+def test_legacy_purges():
+    schedule = ShockSchedule.from_firing_schedule({"steps": {5, 10}, "level-retire probability": [(2, 0.4)]},
+                                                  BASELINE, 3)
+    assert [schedule.at(step)[0][1] for step in (4, 5, 6, 10, 11)] == pytest.approx([0.1, 0.4, 0.1, 0.4, 0.1])
+
+
+def test_ramp_into_new_rows_is_kept():
+    schedule = make_schedule()
+    schedule.retirement_ramp(2, 0, 1, 0.7, 0.7)
+    assert np.isclose(schedule.at(0)[0][1], 0.7)
+    assert np.isclose(schedule.at(1)[0][1], 0.1)
+
+
+@pytest.mark.parametrize("level", [0, 4])
+def test_levels_out_of_range_are_rejected(level):
+    schedule = make_schedule()
+    with pytest.raises(ValueError):
+        schedule.purge({level: 0.5}, 3)
+    with pytest.raises(ValueError):
+        schedule.retirement_ramp(level, 0, 5, 0.1, 0.5)
+    with pytest.raises(ValueError):
+        schedule.vacancy_move_shock({level: [0.3, 0.1, 0.3, 0.3]}, 0)
+    with pytest.raises(ValueError):
+        schedule.vacancy_move_ramp(level, 0, 5, [0.3, 0.1, 0.3, 0.3], [0.7, 0.1, 0.1, 0.1])
+
+
+def test_legacy_retirement_probs_take_one_step():
+    firing_schedule = {"steps": {5}, "actor retirement probs": [0.4, 0.4, 0.6]}
+    schedule = ShockSchedule.from_firing_schedule(firing_schedule, BASELINE, 3)
+    assert np.allclose(schedule.at(4)[0], [0.1, 0.1, 0.1])
+    assert np.allclose(schedule.at(1000)[0], [0.4, 0.4, 0.6])
+    with pytest.raises(ValueError):
+        ShockSchedule.from_firing_schedule(dict(firing_schedule, steps={5, 10}), BASELINE, 3)
@@ -0,0 +1,76 @@
+"""
+tests for the pure helpers in sweep.py
+"""
+
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+pytest.importorskip("mesa")
+from model import MobilityModel
+from sweep import make_grid, get_confidence_half_widths, run_grid_point
+
+
+def test_make_grid_covers_all_combinations():
+    grid = make_grid({"a": [1, 2], "b": ["x", "y", "z"]})
+    assert len(grid) == 6
+    assert {"a": 2, "b": "y"} in grid
+
+
+def test_half_widths_use_student_t_for_small_samples():
+    differences = np.array([[0.0, 1.0], [2.0, 1.0]])  # sd of sqrt(2) and 0, two replicates
+    half_widths = get_confidence_half_widths(differences, 0.95)
+    assert half_widths[0] == pytest.approx(12.706, abs=1e-3)
+    assert half_widths[1] == 0
+
+
+def test_half_widths_shrink_towards_normal_for_large_samples():
+    differences = np.tile([[-1.0], [1.0]], (500, 1))  # 1000 replicates, sd close to 1
+    expected = 1.962 * differences.std(ddof=1) / np.sqrt(1000)
+    assert get_confidence_half_widths(differences, 0.95)[0] == pytest.approx(expected, rel=1e-3)
+
+
+PARAMS = {"positions_per_level": [5, 20, 40],
+          "move_probabilities": {"actor retirement probs": [0.1, 0.1, 0.1],
+                                 "vacancy move probs": [0.3, 0.1, 0.3, 0.3]},
+          "initial_vacancy_fraction": 0.2,
+          "firing_schedule": {"steps": set(), "actor retirement probs": [0.1, 0.1, 0.1]}}
+METRICS = [("agent_counts", "Vacancy Count"), ("percent_vacant_per_level", "Level 3")]
+
+
+def run_model(seed, steps=10, **params):
+    model = MobilityModel(**dict(PARAMS, **params), seed=seed)
+    for i in range(steps):
+        model.step()
+    return model
+
+
+def test_same_seed_same_collected_data():
+    first, second = run_model(7), run_model(7)
+    assert str(first.datacollector.model_vars) == str(second.datacollector.model_vars)
+    assert str(first.datacollector.model_vars) != str(run_model(8).datacollector.model_vars)
+
+
+def test_streams_line_up_again_after_scenarios_diverge():
+    firing = {"firing_schedule": {"steps": {3}, "actor retirement probs": [0.9, 0.9, 0.9]}}
+    models, draws = [], []
+    for params in ({}, firing):
+        model = run_model(7, steps=6, **params)
+        model.reseed(model.schedule.steps)  # as the next step would
+        models.append(model)
+        draws.append((random.random(), np.random.uniform()))
+    assert str(models[0].datacollector.model_vars) != str(models[1].datacollector.model_vars)
+    assert draws[0] == draws[1]
+
+
+def test_grid_point_stops_once_tolerance_is_met():
+    result = run_grid_point(PARAMS, ({}, {}), 5, METRICS, tolerance=0.1, min_replicates=3, max_replicates=10)
+    assert result["Replicates"] == 3  # identical scenarios on common random numbers: zero-width intervals
+    assert all(d == 0 for d in result["Mean Difference"].values())
+
+
+def test_grid_point_keeps_going_until_max_replicates():
+    firing = {"firing_schedule": {"steps": {2}, "actor retirement probs": [0.5, 0.5, 0.5]}}
+    result = run_grid_point(PARAMS, ({}, firing), 5, METRICS, tolerance=0.0, min_replicates=2, max_replicates=4)
+    assert result["Replicates"] == 4